@@ -0,0 +1,113 @@
+"""Benchmark of the key search on the AWS S3 page, against a moto bucket.
+
+Fills an in-memory S3 bucket with `moto`, then drives the S3 page with
+Streamlit's headless `AppTest` runner (streamlit>=1.28), timing the listing and
+each search. Times are for whole reruns of the page, as seen by a viewer,
+including the runner's own overhead. It runs offline:
+
+    python benchmark_s3_search.py --keys 20000 --search part-00001 .json
+"""
+
+import argparse
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pandas as pd
+from moto import mock_aws
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = "streamlit_app.py"
+PAGE = "📦 AWS S3"
+BUCKET = "benchmark"
+
+STORAGE_CLASSES = ["STANDARD", "STANDARD_IA", "GLACIER"]
+EXTENSIONS = [".csv", ".json", ".parquet"]
+
+
+def fill_bucket(keys: int):
+    """Create the bucket and upload `keys` empty-ish objects with random sizes,
+    storage classes and extensions"""
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    rng = random.Random(0)
+
+    def upload(i):
+        key = f"data/{i % 100:02d}/part-{i:07d}{rng.choice(EXTENSIONS)}"
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=key,
+            Body=b"x" * rng.randint(1, 1024),
+            StorageClass=rng.choice(STORAGE_CLASSES),
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(upload, range(keys)))
+
+
+def files_found(app: AppTest) -> str:
+    """Get the number of files listed by the page"""
+    for markdown in app.markdown:
+        if markdown.value.startswith("📁"):
+            return markdown.value.split()[2]
+    return "?"
+
+
+def search_box(app: AppTest):
+    """Get the key search box. Widgets must be looked up again after each run."""
+    return next(box for box in app.text_input if box.label.startswith("Search"))
+
+
+def timed(app: AppTest, step: str, timeout: float) -> dict:
+    """Rerun the app and measure how long it took"""
+    start = time.perf_counter()
+    app.run(timeout=timeout)
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return {"step": step, "ms": round(elapsed * 1000, 1), "files": files_found(app)}
+
+
+def run(keys: int, searches: list, timeout: float) -> pd.DataFrame:
+    app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+    app.secrets["aws_s3"] = {"ACCESS_KEY_ID": "bench", "SECRET_ACCESS_KEY": "bench"}
+    app.run()
+    app.selectbox(key="page_selector").select(PAGE)
+
+    results = [timed(app, f"list {keys} keys (cold cache)", timeout)]
+    results.append(timed(app, "rerun (warm cache)", timeout))
+
+    for search in searches:
+        search_box(app).input(search)
+        results.append(timed(app, f"search {search!r}", timeout))
+
+    search_box(app).input("")
+    app.multiselect[0].select(STORAGE_CLASSES[0])
+    results.append(timed(app, f"storage class {STORAGE_CLASSES[0]}", timeout))
+
+    app.multiselect[0].unselect(STORAGE_CLASSES[0])
+    results.append(timed(app, "clear filters", timeout))
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keys", type=int, default=10000)
+    parser.add_argument("--search", nargs="+", default=["part-00001", ".json", "zzz"])
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    # moto answers every call in this process: no real credentials are used
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    set_log_level(logging.ERROR)
+
+    with mock_aws():
+        start = time.perf_counter()
+        fill_bucket(args.keys)
+        print(f"Uploaded {args.keys} keys in {time.perf_counter() - start:.1f} s")
+        report = run(args.keys, args.search, args.timeout)
+    print(report.to_string(index=False))
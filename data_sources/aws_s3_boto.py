@@ -140,6 +140,7 @@ def app():
     import streamlit as st
     import pandas as pd
     import boto3
+    from utils.caching import to_cache, load, size_summary
 
     @st.experimental_singleton()
     def get_connector():
@@ -152,6 +153,8 @@ def app():
 
     # Time to live: the maximum number of seconds to keep an entry in the cache
     TTL = 24 * 60 * 60
+    # Maximum number of listings to keep in the cache, so that it can't fill up the memory
+    MAX_ENTRIES = 20
 
     @st.experimental_memo(ttl=TTL)
     def get_buckets(_connector) -> list:
@@ -165,15 +168,18 @@ def app():
             s3_object.storage_class,
         )
 
-    @st.experimental_memo(ttl=TTL)
-    def get_files(_connector, bucket) -> pd.DataFrame:
-        files = list(s3.Bucket(name=bucket).objects.all())
-        if files:
-            df = pd.DataFrame(
-                pd.Series(files).apply(to_tuple).tolist(),
-                columns=["key", "last_modified", "size", "storage_class"],
-            )
-            return df
+    @st.experimental_memo(ttl=TTL, max_entries=MAX_ENTRIES)
+    def get_files(_connector, bucket, prefix="") -> pd.DataFrame:
+        # The prefix is filtered by S3 itself, so only matching keys are listed
+        objects = _connector.Bucket(name=bucket).objects.filter(Prefix=prefix)
+        # Objects are turned into small tuples as pages arrive, so the boto3 objects
+        # don't pile up. The tuples themselves are all kept until the frame is built.
+        files = map(to_tuple, objects)
+        df = pd.DataFrame.from_records(
+            files, columns=["key", "last_modified", "size", "storage_class"]
+        )
+        if not df.empty:
+            return to_cache(df, "AWS S3", f"files {bucket}/{prefix}")
 
     st.markdown(f"## 📦 Connecting to AWS S3")
 
@@ -183,11 +189,39 @@ def app():
     if buckets:
         st.write(f"🎉 Found {len(buckets)} bucket(s)!")
         bucket = st.selectbox("Choose a bucket", buckets)
-        files = get_files(s3, bucket)
+        prefix = st.text_input("Only list keys starting with", "")
+        files = load(get_files(s3, bucket, prefix))
         if isinstance(files, pd.DataFrame):
+            listing = files
+            search = st.text_input("Search keys containing", "")
+            if search:
+                files = files[files.key.str.contains(search, regex=False)]
+            # Options are taken from the whole listing, so they don't change while searching
+            storage_classes = st.multiselect(
+                "Storage class", sorted(listing.storage_class.unique())
+            )
+            if storage_classes:
+                files = files[files.storage_class.isin(storage_classes)]
+
+            # Bounds are taken from the whole listing, so they don't move while filtering
+            min_size, max_size = int(listing["size"].min()), int(listing["size"].max())
+            if min_size < max_size:
+                low, high = st.slider(
+                    "Size (bytes)", min_size, max_size, (min_size, max_size)
+                )
+                files = files[files["size"].between(low, high)]
+
+            first_day = listing.last_modified.min().date()
+            last_day = listing.last_modified.max().date()
+            days = st.date_input("Last modified between", (first_day, last_day))
+            # While the range is being picked, only its start is returned
+            if len(days) == 2:
+                files = files[files.last_modified.dt.date.between(*days)]
+
             st.write(f"📁 Found {len(files)} file(s) in this bucket:")
             st.dataframe(files)
+            st.caption(size_summary("AWS S3"))
         else:
-            st.write(f"This bucket is empty!")
+            st.write(f"No file found in this bucket!")
     else:
         st.write(f"Couldn't find any bucket. Make sure to create one!")
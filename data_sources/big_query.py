@@ -45,11 +45,9 @@ def get_connector():
 
 
 def tutorial():
-    st.write(
-        """We assume that you have a BigQuery account already, and a database.  
+    st.write("""We assume that you have a BigQuery account already, and a database.  
         If not, please follow [Google's quickstart guide](https://cloud.google.com/bigquery/docs/quickstarts/quickstart-web-ui).
-    """
-    )
+    """)
 
     to_do(
         [
@@ -155,6 +153,9 @@ def app():
     import streamlit as st
     from google.cloud import bigquery
     from google.oauth2.service_account import Credentials
+    from utils.caching import to_cache, load, size_summary
+    from utils.scheduler import query_slot, queue_summary, QueryTimeout
+    from utils.scheduler import INTERACTIVE, BULK
 
     # Share the connector across all users connected to the app
     @st.experimental_singleton()
@@ -166,6 +167,10 @@ def app():
 
     # Time to live: the maximum number of seconds to keep an entry in the cache
     TTL = 24 * 60 * 60
+    # Maximum number of results to keep in the cache, so that it can't fill up the memory
+    MAX_ENTRIES = 50
+    # Number of rows to show when previewing a table
+    PREVIEW_ROWS = 100
 
     # Using `experimental_memo()` to memoize function executions
     @st.experimental_memo(ttl=TTL)
@@ -173,19 +178,98 @@ def app():
         """Get the list of projects available"""
         return [project.project_id for project in list(_connector.list_projects())]
 
-    @st.experimental_memo(ttl=TTL)
+    @st.experimental_memo(ttl=TTL, max_entries=MAX_ENTRIES)
     def get_data(_connector, project: str) -> pd.DataFrame:
         """Get schema data for a given project"""
         query = f"SELECT * FROM {project}.INFORMATION_SCHEMA.SCHEMATA;"
-        return _connector.query(query).to_dataframe()
+        # Only query jobs count towards BigQuery's concurrency quota.
+        # This catalog lookup is needed to draw the page: it goes ahead of previews.
+        with query_slot("BigQuery", INTERACTIVE):
+            data = _connector.query(query).to_dataframe()
+            return to_cache(data, "BigQuery", f"schemas {project}")
+
+    @st.experimental_memo(ttl=TTL)
+    def get_tables(_connector, dataset: str) -> list:
+        """Get the list of tables in a given dataset.
+        Views and external tables are left out: `list_rows()` can't read them."""
+        tables = _connector.list_tables(dataset)
+        return [table.table_id for table in tables if table.table_type == "TABLE"]
+
+    @st.experimental_memo(ttl=TTL)
+    def get_table_info(_connector, table_id: str) -> dict:
+        """Get the metadata of a table. This doesn't run any query."""
+        table = _connector.get_table(table_id)
+        partitioning = table.time_partitioning or table.range_partitioning
+        return {
+            "num_rows": table.num_rows,
+            "num_bytes": table.num_bytes,
+            "partitioning": repr(partitioning) if partitioning else None,
+            "schema": [field.to_api_repr() for field in table.schema],
+        }
+
+    # Rows are read with `list_rows()` (tabledata.list): unlike a query, it is free
+    @st.experimental_memo(ttl=TTL, max_entries=MAX_ENTRIES)
+    def get_preview(_connector, table_id: str, columns: tuple) -> pd.DataFrame:
+        """Get the first rows of a table, for the given columns only"""
+        schema = get_table_info(_connector, table_id)["schema"]
+        fields = [
+            bigquery.SchemaField.from_api_repr(field)
+            for field in schema
+            if field["name"] in columns
+        ]
+        # Reading rows is free but rate limited: it shares the query slots
+        with query_slot("BigQuery", BULK):
+            rows = _connector.list_rows(
+                table_id, selected_fields=fields, max_results=PREVIEW_ROWS
+            )
+            data = rows.to_dataframe(create_bqstorage_client=False)
+        return to_cache(data, "BigQuery", f"preview {table_id}")
 
     st.markdown(f"## 🔎 BigQuery app")
 
     big_query_connector = get_connector()
 
+    st.caption(queue_summary("BigQuery"))
+
     projects = get_projects(big_query_connector)
     project = st.selectbox("Choose a BigQuery project", projects)
 
-    data = get_data(big_query_connector, project)
+    try:
+        data = load(get_data(big_query_connector, project))
+    except QueryTimeout as error:
+        st.warning(f"⏳ {error}: BigQuery is busy, please try again later!")
+        st.stop()
     st.write(f"👇 Find below the available schemas in project `{project}`!")
     st.dataframe(data)
+
+    if data.empty:
+        st.write(f"This project doesn't contain any dataset!")
+        return
+
+    dataset = st.selectbox("Choose a dataset", data.schema_name)
+    tables = get_tables(big_query_connector, f"{project}.{dataset}")
+    if tables:
+        table = st.selectbox("Choose a table to preview", tables)
+        table_id = f"{project}.{dataset}.{table}"
+        info = get_table_info(big_query_connector, table_id)
+        columns = [field["name"] for field in info["schema"]]
+        st.write(
+            f"📋 `{table_id}` has {info['num_rows']} row(s) "
+            f"({info['num_bytes']} bytes)"
+        )
+        if info["partitioning"]:
+            st.caption(f"Partitioned by: {info['partitioning']}")
+        columns = st.multiselect("Columns", columns, columns)
+        if columns:
+            try:
+                preview = get_preview(big_query_connector, table_id, tuple(columns))
+            except QueryTimeout as error:
+                st.warning(f"⏳ {error}: BigQuery is busy, please try again later!")
+                st.stop()
+            preview = load(preview)
+            st.write(f"👇 Find below the first rows of `{table_id}`")
+            st.dataframe(preview)
+    else:
+        st.write(f"This dataset doesn't contain any table that can be previewed!")
+
+    st.caption(size_summary("BigQuery"))
@@ -12,6 +12,11 @@ MAKE_IT_PUBLIC = f"""**Make sure that your Sheet is public**
 
 Open your Sheet, click on {to_button("Share")} > {to_button("Share with ...")} and select {to_button("Anyone with the link can view")}."""
 
+CREATE_TOML = """**Create TOML credentials**  
+
+You can combine several sheets: paste one URL per line. To read a given tab of a Sheet,
+open that tab and copy the URL from your browser: it ends with `#gid=...`, which selects the tab."""
+
 PASTE_INTO_SECRETS = f"""**Paste these TOML credentials into your Streamlit Secrets! **  
 
 To open your settings, click on {to_button("Manage app")} > {to_button("⋮")} > {to_button("⚙ Settings")} and then update {to_button("Sharing")} and {to_button("Secrets")}"""
@@ -21,9 +26,16 @@ To open your settings, click on {to_button("Manage app")} > {to_button("⋮")} >
 def get_connector():
     connector = connect()
 
-    assert st.secrets["gsheets"]["public_gsheets_url"].startswith(
-        "https://docs.google.com/"
-    ), "Invalid URL, must start with https://docs.google.com"
+    # Accept either a single URL or a list of URLs (one per sheet or tab).
+    # This must match how `app()` reads the secrets below.
+    gsheets_urls = st.secrets["gsheets"]["public_gsheets_url"]
+    if isinstance(gsheets_urls, str):
+        gsheets_urls = [gsheets_urls]
+
+    for gsheets_url in gsheets_urls:
+        assert gsheets_url.startswith(
+            "https://docs.google.com/"
+        ), "Invalid URL, must start with https://docs.google.com"
 
     return connector
 
@@ -51,25 +63,27 @@ def tutorial():
     )
 
     def url_to_toml():
-        url_input_str = st.text_input("URL of the Google Sheet")
+        url_input_str = st.text_area("URL(s) of the Google Sheet(s), one per line")
         convert = st.button("Create TOML credentials")
         if url_input_str or convert:
-            if not url_input_str.startswith("https://docs.google.com/"):
+            urls = [url.strip() for url in url_input_str.splitlines() if url.strip()]
+            if not urls or not all(
+                url.startswith("https://docs.google.com/") for url in urls
+            ):
                 st.error(
                     "Invalid URL! The URL must start with https://docs.google.com. Please retry!"
                 )
             else:
+                # A single Sheet is written as a string, several as a list
+                public_gsheets_url = urls[0] if len(urls) == 1 else urls
                 toml_output = toml.dumps(
-                    {"gsheets": {"public_gsheets_url": url_input_str}}
+                    {"gsheets": {"public_gsheets_url": public_gsheets_url}}
                 )
                 st.code(toml_output, "toml")
 
     to_do(
         [
-            (
-                st.write,
-                """**Create TOML credentials**""",
-            ),
+            (st.write, CREATE_TOML),
             (url_to_toml,),
         ],
         "google_sheet_creds_formatted",
@@ -92,32 +106,87 @@ def tutorial():
 def app():
     import streamlit as st
     import pandas as pd
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
     from gsheetsdb import connect
+    from utils.caching import to_cache, load, size_summary
 
     # Share the connector across all users connected to the app
     @st.experimental_singleton()
     def get_connector():
         return connect()
 
-    # Time to live: the maximum number of seconds to keep an entry in the cache
+    # Time to live: the maximum number of seconds to keep a sheet in the cache
     TTL = 24 * 60 * 60
+    # Maximum number of sheets fetched at the same time
+    MAX_WORKERS = 8
+
+    # Share the fetched sheets across all users connected to the app.
+    # Each sheet has its own entry, so adding a URL only fetches the new sheet.
+    @st.experimental_singleton()
+    def get_sheets() -> dict:
+        """Create a cache of sheets: for each URL, the time it was fetched and its data"""
+        return {"lock": threading.Lock(), "sheets": {}}
 
-    # Using `experimental_memo()` to memoize function executions
-    @st.experimental_memo(ttl=TTL)
     def query_to_dataframe(_connector, query: str) -> pd.DataFrame:
         rows = _connector.execute(query, headers=1)
         dataframe = pd.DataFrame(list(rows))
         return dataframe
 
-    @st.experimental_memo(ttl=600)
-    def get_data(_connector, gsheets_url) -> pd.DataFrame:
-        return query_to_dataframe(_connector, f'SELECT * FROM "{gsheets_url}"')
+    def get_data(_connector, gsheets_urls: list) -> dict:
+        """Get each sheet from the cache, and fetch the missing ones in parallel:
+        this takes as long as the slowest missing sheet. A sheet that can't be
+        fetched gets its exception instead, and is fetched again on the next rerun."""
+        cache = get_sheets()
+        now = time.time()
+        with cache["lock"]:
+            for gsheets_url, (fetched_at, _) in list(cache["sheets"].items()):
+                if now - fetched_at >= TTL:
+                    del cache["sheets"][gsheets_url]
+            data = {
+                gsheets_url: cache["sheets"][gsheets_url][1]
+                for gsheets_url in gsheets_urls
+                if gsheets_url in cache["sheets"]
+            }
+        missing = [
+            gsheets_url for gsheets_url in gsheets_urls if gsheets_url not in data
+        ]
+
+        def fetch(gsheets_url):
+            try:
+                return query_to_dataframe(_connector, f'SELECT * FROM "{gsheets_url}"')
+            except Exception as e:
+                return e
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                fetched = list(executor.map(fetch, missing))
+            for gsheets_url, result in zip(missing, fetched):
+                if not isinstance(result, Exception):
+                    result = to_cache(result, "Google Sheet", gsheets_url)
+                    with cache["lock"]:
+                        cache["sheets"][gsheets_url] = (time.time(), result)
+                data[gsheets_url] = result
+        return data
 
     st.markdown(f"## 📝 Connecting to a public Google Sheet")
 
     gsheet_connector = get_connector()
-    gsheets_url = st.secrets["gsheets"]["public_gsheets_url"]
 
-    data = get_data(gsheet_connector, gsheets_url)
-    st.write("👇 Find below the data in the Google Sheet you provided in the secrets:")
-    st.dataframe(data)
+    # Accept either a single URL or a list of URLs (one per sheet or tab)
+    gsheets_urls = st.secrets["gsheets"]["public_gsheets_url"]
+    if isinstance(gsheets_urls, str):
+        gsheets_urls = [gsheets_urls]
+
+    data = get_data(gsheet_connector, gsheets_urls)
+    st.write(
+        "👇 Find below the data in the Google Sheet(s) you provided in the secrets:"
+    )
+    for gsheets_url in gsheets_urls:
+        st.caption(gsheets_url)
+        if isinstance(data[gsheets_url], Exception):
+            st.error(f"❌ Could not fetch this sheet: {data[gsheets_url]}")
+        else:
+            st.dataframe(load(data[gsheets_url]))
+    st.caption(size_summary("Google Sheet"))
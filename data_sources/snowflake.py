@@ -84,6 +84,11 @@ def app():
     import pandas as pd
     from snowflake.connector import connect
     from snowflake.connector.connection import SnowflakeConnection
+    from snowflake.connector.errors import DatabaseError
+    from utils.caching import to_cache, load, size_summary
+    from utils.caching import recall_query, remember_query
+    from utils.scheduler import query_slot, queue_summary, QueryTimeout
+    from utils.scheduler import INTERACTIVE, BULK
 
     # Share the connector across all users connected to the app
     @st.experimental_singleton()
@@ -94,26 +99,121 @@ def app():
 
     # Time to live: the maximum number of seconds to keep an entry in the cache
     TTL = 24 * 60 * 60
+    # Maximum number of results to keep in the cache, so that it can't fill up the memory
+    MAX_ENTRIES = 50
+
+    # Snowflake keeps query results for 24 hours after they were last used:
+    # reuse them until shortly before that
+    RESULT_RETENTION = 23 * 60 * 60
 
     # Using `experimental_memo()` to memoize function executions
     @st.experimental_memo(ttl=TTL)
     def get_databases(_connector) -> pd.DataFrame:
         """Get all databases available in Snowflake"""
-        return pd.read_sql("SHOW DATABASES;", _connector)
+        data = pd.read_sql("SHOW DATABASES;", _connector)
+        return to_cache(data, "Snowflake", "databases")
 
     @st.experimental_memo(ttl=TTL)
-    def get_data(_connector, database) -> pd.DataFrame:
-        """Get tables available in this database"""
-        query = f"SELECT * FROM {database}.INFORMATION_SCHEMA.TABLES;"
-        return pd.read_sql(query, _connector)
+    def get_schemas(_connector, database) -> pd.DataFrame:
+        """Get all schemas available in this database, except INFORMATION_SCHEMA
+        (SHOW SCHEMAS lists it first, and it has no tables to browse)"""
+        query = f"SHOW SCHEMAS IN DATABASE {database};"
+        data = pd.read_sql(query, _connector)
+        data = data[data.name != "INFORMATION_SCHEMA"].reset_index(drop=True)
+        return to_cache(data, "Snowflake", f"schemas {database}")
+
+    @st.experimental_memo(ttl=60)
+    def get_last_change(_connector, database, schema) -> tuple:
+        """Get a cheap fingerprint of the tables in this schema.
+        It changes whenever a table is created, altered or dropped."""
+        query = f"""SELECT COUNT(*), MAX(LAST_ALTERED)
+            FROM {database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s;"""
+        # It is needed to draw the page: it goes ahead of the table listings
+        with query_slot("Snowflake", INTERACTIVE):
+            data = pd.read_sql(query, _connector, params=(schema,))
+        return tuple(data.iloc[0])
+
+    # `last_change` is part of the cache key: tables are only re-read when it changes
+    @st.experimental_memo(ttl=TTL, max_entries=MAX_ENTRIES)
+    def get_data(_connector, database, schema, last_change) -> pd.DataFrame:
+        """Get tables available in this schema"""
+        query = f"""SELECT * FROM {database}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s;"""
+        # The memo only lives in this process: the registry of query IDs is kept on
+        # disk, so that results are also reused after a restart or by other processes
+        key, fingerprint = repr((query, schema)), repr(last_change)
+        query_id = recall_query(key, fingerprint, RESULT_RETENTION)
+
+        with _connector.cursor() as cursor:
+            # If this query ran recently on the same tables, fetch its persisted result
+            if query_id is not None:
+                try:
+                    cursor.get_results_from_sfqid(query_id)
+                except DatabaseError:
+                    # The result was dropped early, or the ID is from another account
+                    query_id = None
+            if query_id is None:
+                # Listing tables may scan a big catalog: it waits for a free query slot.
+                # SHOW commands don't use the warehouse and run right away.
+                with query_slot("Snowflake", BULK):
+                    cursor.execute(query, (schema,))
+                # Replaces the record of this query on older tables, if any
+                remember_query(key, fingerprint, cursor.sfqid)
+
+            # The result is downloaded in Arrow format, then converted all at once
+            data = cursor.fetch_pandas_all()
+            return to_cache(data, "Snowflake", f"tables {database}.{schema}")
+
+    # Altering a table's columns changes its LAST_ALTERED, hence `last_change`
+    @st.experimental_memo(ttl=TTL, max_entries=MAX_ENTRIES)
+    def get_columns(_connector, database, schema, last_change) -> pd.DataFrame:
+        """Get the columns of all tables in this schema"""
+        query = f"""SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+            FROM {database}.INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = %s
+            ORDER BY TABLE_NAME, ORDINAL_POSITION;"""
+        with query_slot("Snowflake", BULK):
+            data = pd.read_sql(query, _connector, params=(schema,))
+        return to_cache(data, "Snowflake", f"columns {database}.{schema}")
 
     st.markdown(f"## ❄️ Connecting to Snowflake")
 
     snowflake_connector = get_connector()
 
-    databases = get_databases(snowflake_connector)
+    st.caption(queue_summary("Snowflake"))
+
+    databases = load(get_databases(snowflake_connector))
     database = st.selectbox("Choose a Snowflake database", databases.name)
 
-    data = get_data(snowflake_connector, database)
-    st.write(f"👇 Find below the available tables in database `{database}`")
+    schemas = load(get_schemas(snowflake_connector, database))
+    schema = st.selectbox("Choose a schema", schemas.name)
+
+    try:
+        last_change = get_last_change(snowflake_connector, database, schema)
+        data = load(get_data(snowflake_connector, database, schema, last_change))
+    except QueryTimeout as error:
+        st.warning(f"⏳ {error}: the warehouse is busy, please try again later!")
+        st.stop()
+
+    search = st.text_input("Search tables and columns by name")
+    if search:
+        try:
+            columns = load(
+                get_columns(snowflake_connector, database, schema, last_change)
+            )
+        except QueryTimeout as error:
+            st.warning(f"⏳ {error}: the warehouse is busy, please try again later!")
+            st.stop()
+        columns = columns[
+            columns.TABLE_NAME.str.contains(search, case=False, regex=False)
+            | columns.COLUMN_NAME.str.contains(search, case=False, regex=False)
+        ]
+        matches = data.TABLE_NAME.str.contains(search, case=False, regex=False)
+        data = data[matches | data.TABLE_NAME.isin(columns.TABLE_NAME)]
+        st.write(f"🔎 {len(columns)} matching column(s)")
+        st.dataframe(columns)
+
+    st.write(f"👇 Find below the available tables in schema `{database}.{schema}`")
     st.dataframe(data)
+    st.caption(size_summary("Snowflake"))
@@ -0,0 +1,385 @@
+"""Offline load test for the Data Sources app.
+
+Drives virtual viewers through every data source page with Streamlit's headless
+`AppTest` runner (1.28 <= streamlit < 1.37). Connectors are replaced by local
+stand-ins, so no credentials or network access are needed:
+
+    python load_test.py --sessions 1 4 16 --query-latency 0.05
+
+For each concurrency level, it reports rerun latency percentiles, throughput
+and the memory of the process. Caches are cleared between levels.
+"""
+
+import argparse
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+import streamlit as st
+import toml
+from google.cloud import bigquery
+from packaging.version import Version
+from snowflake.connector.errors import ProgrammingError
+from streamlit.logger import set_log_level
+from streamlit.testing.v1 import AppTest
+
+# gsheetsdb doesn't import on recent Pythons, and the harness never uses it:
+# a stand-in module takes its place, connecting to `FakeGsheetsConnection` below
+gsheetsdb = types.ModuleType("gsheetsdb")
+gsheetsdb.connect = lambda: FakeGsheetsConnection()
+sys.modules["gsheetsdb"] = gsheetsdb
+
+from data_sources import big_query, snowflake, aws_s3_boto, google_sheet  # noqa: E402
+from utils import intro  # noqa: E402
+
+# `shared_server()` relies on Streamlit internals, checked against these versions
+STREAMLIT_VERSIONS = (Version("1.28"), Version("1.37"))
+
+APP_FILE = "streamlit_app.py"
+
+PAGES = ["🔎  BigQuery", "❄️ Snowflake", "📦 AWS S3", "📝 Google Sheet"]
+
+SECRETS = {
+    "bigquery": {"type": "service_account", "project_id": "load-test"},
+    "snowflake": {"user": "load-test", "password": "", "account": "load-test"},
+    "aws_s3": {"ACCESS_KEY_ID": "load-test", "SECRET_ACCESS_KEY": "load-test"},
+    "gsheets": {
+        "public_gsheets_url": [
+            "https://docs.google.com/spreadsheets/d/load-test/edit#gid=0",
+            "https://docs.google.com/spreadsheets/d/load-test/edit#gid=1",
+        ]
+    },
+}
+
+# Seconds slept by every stand-in call, to mimic a remote service
+QUERY_LATENCY = 0.0
+
+
+def wait():
+    time.sleep(QUERY_LATENCY)
+
+
+class FakeSnowflakeCursor:
+    """Answers the queries of the Snowflake page with canned rows"""
+
+    results = {}
+
+    def __init__(self):
+        self.description, self.rows, self.sfqid = None, [], None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def execute(self, query, params=None):
+        wait()
+        if query.startswith("SHOW DATABASES"):
+            columns = ["name", "owner"]
+            rows = [(f"DB_{i}", "SYSADMIN") for i in range(3)]
+        elif query.startswith("SHOW SCHEMAS"):
+            columns = ["name", "owner"]
+            rows = [("INFORMATION_SCHEMA", "")]
+            rows += [(f"SCHEMA_{i}", "SYSADMIN") for i in range(3)]
+        elif "COUNT(*)" in query:
+            columns = ["COUNT(*)", "MAX(LAST_ALTERED)"]
+            rows = [(50, pd.Timestamp("2021-11-25"))]
+        elif "INFORMATION_SCHEMA.COLUMNS" in query:
+            columns = ["TABLE_NAME", "COLUMN_NAME", "DATA_TYPE"]
+            rows = [
+                (f"TABLE_{i}", f"COLUMN_{j}", "TEXT")
+                for i in range(50)
+                for j in range(5)
+            ]
+        else:
+            columns = ["TABLE_SCHEMA", "TABLE_NAME", "TABLE_OWNER", "ROW_COUNT"]
+            rows = [(params[0], f"TABLE_{i}", "SYSADMIN", i) for i in range(50)]
+        self.description = [(column,) for column in columns]
+        self.rows = rows
+        self.sfqid = str(uuid.uuid4())
+        self.results[self.sfqid] = (self.description, rows)
+        return self
+
+    def get_results_from_sfqid(self, sfqid):
+        if sfqid not in self.results:
+            raise ProgrammingError(f"Unknown query ID {sfqid}")
+        self.description, self.rows = self.results[sfqid]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetch_pandas_all(self):
+        columns = [column[0] for column in self.description]
+        return pd.DataFrame(self.rows, columns=columns)
+
+
+class FakeSnowflakeConnection:
+    def cursor(self):
+        return FakeSnowflakeCursor()
+
+
+class FakeBigQueryClient:
+    """Answers the calls of the BigQuery page with canned metadata and rows"""
+
+    def __init__(self, credentials=None):
+        self.schema = [
+            bigquery.SchemaField("id", "INTEGER"),
+            bigquery.SchemaField("name", "STRING"),
+        ]
+
+    def list_projects(self):
+        wait()
+        return [SimpleNamespace(project_id=f"project-{i}") for i in range(2)]
+
+    def query(self, query):
+        wait()
+        data = pd.DataFrame(
+            {"schema_name": [f"dataset_{i}" for i in range(3)], "location": "US"}
+        )
+        return SimpleNamespace(to_dataframe=lambda: data)
+
+    def list_tables(self, dataset):
+        wait()
+        return [
+            SimpleNamespace(table_id="events", table_type="TABLE"),
+            SimpleNamespace(table_id="users", table_type="TABLE"),
+            SimpleNamespace(table_id="recent_events", table_type="VIEW"),
+        ]
+
+    def get_table(self, table_id):
+        wait()
+        return SimpleNamespace(
+            num_rows=1000,
+            num_bytes=64000,
+            time_partitioning=None,
+            range_partitioning=None,
+            schema=self.schema,
+        )
+
+    def list_rows(self, table, selected_fields=None, max_results=None):
+        wait()
+        data = pd.DataFrame({"id": range(max_results), "name": "load-test"})
+        data = data[[field.name for field in selected_fields]]
+        return SimpleNamespace(to_dataframe=lambda **kwargs: data)
+
+
+class FakeS3Resource:
+    """Answers the calls of the S3 page with canned buckets and objects"""
+
+    def __init__(self):
+        self.buckets = SimpleNamespace(all=self.all_buckets)
+
+    def all_buckets(self):
+        wait()
+        return [SimpleNamespace(name=f"bucket-{i}") for i in range(2)]
+
+    def list_objects(self, Prefix=""):
+        wait()
+        return [
+            SimpleNamespace(
+                key=f"{Prefix}data/file_{i}.csv",
+                last_modified=pd.Timestamp("2021-11-25", tz="UTC")
+                + pd.Timedelta(days=i),
+                size=1024 * (i + 1),
+                storage_class="STANDARD",
+            )
+            for i in range(100)
+        ]
+
+    def Bucket(self, name):
+        return SimpleNamespace(objects=SimpleNamespace(filter=self.list_objects))
+
+
+class FakeGsheetsConnection:
+    """Answers the queries of the Google Sheet page with canned rows"""
+
+    def execute(self, query, headers=1):
+        wait()
+        return [{"name": f"row {i}", "value": i} for i in range(20)]
+
+
+def shared_server(stack: ExitStack, secrets_file: str):
+    """Make all sessions share one runtime, script cache and set of secrets, like
+    viewers of a single server. `AppTest` otherwise swaps them globally on every
+    run and compiles the script once per session, which breaks when sessions
+    run at the same time.
+
+    `AppTest` has no public way to do this: the internals patched here are those
+    of the `STREAMLIT_VERSIONS` range."""
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import (
+        MemoryCacheStorageManager,
+    )
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.runtime.secrets import Secrets
+
+    runtime = mock.MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    stack.enter_context(mock.patch.object(Runtime, "instance", lambda: runtime))
+    stack.enter_context(mock.patch.object(Runtime, "exists", lambda: True))
+
+    script_cache = ScriptCache()
+    stack.enter_context(
+        mock.patch(
+            "streamlit.testing.v1.local_script_runner.ScriptCache",
+            lambda: script_cache,
+        )
+    )
+
+    secrets = Secrets([secrets_file])
+    stack.enter_context(mock.patch("streamlit.secrets", secrets))
+
+
+def stand_ins(cache_dir: str) -> ExitStack:
+    """Replace every connector of the app with a local stand-in, and its secrets
+    with `SECRETS`, using `cache_dir` as the cache directory"""
+    stack = ExitStack()
+    secrets_file = os.path.join(cache_dir, "secrets.toml")
+    with open(secrets_file, "w") as file:
+        toml.dump({**SECRETS, "cache_dir": os.path.join(cache_dir, "cache")}, file)
+    shared_server(stack, secrets_file)
+    # Connectors checked by `streamlit_app.connect()`
+    for module in (big_query, snowflake, aws_s3_boto, google_sheet):
+        stack.enter_context(mock.patch.object(module, "get_connector", object))
+    # Libraries imported by each page's `app()`
+    session = SimpleNamespace(resource=lambda name: FakeS3Resource())
+    for target, fake in [
+        ("snowflake.connector.connect", lambda **kw: FakeSnowflakeConnection()),
+        ("google.cloud.bigquery.Client", FakeBigQueryClient),
+        ("google.oauth2.service_account.Credentials.from_service_account_info", str),
+        ("boto3.Session", lambda **kw: session),
+    ]:
+        stack.enter_context(mock.patch(target, fake))
+    return stack
+
+
+def run_session(timeout: float) -> list:
+    """Drive one viewer through every page, changing each page's selectboxes.
+    Return the latency of each rerun."""
+    latencies = []
+    app = AppTest.from_file(APP_FILE, default_timeout=timeout)
+
+    def rerun():
+        start = time.perf_counter()
+        app.run()
+        latencies.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+
+    rerun()
+    for page in PAGES:
+        app.selectbox(key="page_selector").select(page)
+        rerun()
+        labels = [box.label for box in app.selectbox if box.key != "page_selector"]
+        for label in labels:
+            boxes = [box for box in app.selectbox if box.label == label]
+            if boxes and len(boxes[0].options) > 1:
+                boxes[0].select(boxes[0].options[-1])
+                rerun()
+    app.selectbox(key="page_selector").select(intro.INTRO_IDENTIFIER)
+    rerun()
+    return latencies
+
+
+def memory_mb():
+    """Get the current memory (resident set size) of this process, on Linux only.
+    Unlike `ru_maxrss`, it goes down when memory is freed."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def clear_caches(cache_dir: str):
+    """Start a level from empty caches, like a freshly started server"""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    FakeSnowflakeCursor.results.clear()
+    shutil.rmtree(os.path.join(cache_dir, "cache"), ignore_errors=True)
+
+
+def run_level(sessions: int, timeout: float, cache_dir: str) -> dict:
+    """Run `sessions` viewers at the same time and summarize their reruns,
+    sampling the memory of the process while they run"""
+    clear_caches(cache_dir)
+    start_memory = memory_mb()
+    samples = []
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.05):
+            samples.append(memory_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        results = list(executor.map(run_session, [timeout] * sessions))
+    elapsed = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    latencies = [latency for result in results for latency in result]
+    p50, p95, p99 = [
+        statistics.quantiles(latencies, n=100)[p - 1] * 1000 for p in (50, 95, 99)
+    ]
+    summary = {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "p50 (ms)": round(p50, 1),
+        "p95 (ms)": round(p95, 1),
+        "p99 (ms)": round(p99, 1),
+        "reruns/s": round(len(latencies) / elapsed, 1),
+    }
+    if start_memory is not None:
+        summary["memory at start (MB)"] = round(start_memory, 1)
+        summary["peak memory (MB)"] = round(max(samples, default=start_memory), 1)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--query-latency", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if not STREAMLIT_VERSIONS[0] <= Version(st.__version__) < STREAMLIT_VERSIONS[1]:
+        sys.exit(
+            f"load_test.py needs {STREAMLIT_VERSIONS[0]} <= streamlit < "
+            f"{STREAMLIT_VERSIONS[1]}, found {st.__version__}"
+        )
+
+    QUERY_LATENCY = args.query_latency
+    # Silence the deprecation warnings logged on every rerun
+    set_log_level(logging.ERROR)
+    # The Snowflake stand-in is a plain DBAPI connection, which pandas warns about
+    warnings.filterwarnings("ignore", "pandas only supports SQLAlchemy")
+
+    with tempfile.TemporaryDirectory() as cache_dir, stand_ins(cache_dir):
+        report = pd.DataFrame(
+            [run_level(sessions, args.timeout, cache_dir) for sessions in args.sessions]
+        )
+    print(report.to_string(index=False))
@@ -1,12 +1,15 @@
-import inspect
-import textwrap
 import streamlit as st
+
+# Must be the first Streamlit command: on recent Streamlit versions, importing the
+# modules below shows deprecation warnings the first time
+st.set_page_config(page_title="Data Sources app", page_icon="🔌", layout="centered")
+
 from pathlib import Path
 
 import data_sources
 from data_sources import big_query, snowflake, aws_s3_boto, google_sheet
 
-from utils import ui, intro
+from utils import ui, intro, memory
 
 DATA_SOURCES = {
     intro.INTRO_IDENTIFIER: {
@@ -49,6 +52,15 @@ DATA_SOURCES = {
     },
 }
 
+# The memory usage page is for admins: only list it when they set a password
+if memory.is_enabled():
+    DATA_SOURCES[memory.MEMORY_IDENTIFIER] = {
+        "module": memory,
+        "secret_key": None,
+        "docs_url": None,
+        "get_connector": None,
+    }
+
 NO_CREDENTIALS_FOUND = """❌ **We couldn't find credentials for '`{}`' in your Streamlit Secrets.**   
 Please follow our tutorial just below 👇"""
 
@@ -108,8 +120,7 @@ def what_next():
 
 def code(app):
     st.markdown("## Code")
-    sourcelines, _ = inspect.getsourcelines(app)
-    st.code(textwrap.dedent("".join(sourcelines[1:])), "python")
+    st.code(ui.source_code(app), "python")
 
 
 def connect(data_source):
@@ -145,8 +156,6 @@ def change_page_url():
 
 if __name__ == "__main__":
 
-    st.set_page_config(page_title="Data Sources app", page_icon="🔌", layout="centered")
-
     # Infer selected page from query params.
     query_params = st.experimental_get_query_params()
     if "data_source" in query_params:
@@ -163,10 +172,14 @@ if __name__ == "__main__":
     )
 
     st.session_state.active_page = data_source
+    # Allocations are only traced while a viewer stays on the memory usage page
+    if data_source != memory.MEMORY_IDENTIFIER:
+        memory.leave_page()
     if "data_sources_already_connected" not in st.session_state:
         st.session_state.data_sources_already_connected = list()
 
-    if data_source == intro.INTRO_IDENTIFIER:
+    # Pages without credentials (intro, memory usage) are not data sources
+    if DATA_SOURCES[data_source]["secret_key"] is None:
         show_code = False
         show_balloons = False
 
@@ -0,0 +1,204 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing
+from typing import NamedTuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Number of cached frames whose size is remembered
+MAX_TRACKED_FRAMES = 500
+
+# Frames bigger than this (in MB) are written to disk instead of kept in memory.
+# Override it with `max_cached_mb` in the secrets.
+MAX_CACHED_MB = 100
+
+# Spilled files are deleted after this many seconds: a bit longer than the
+# longest cache TTL, so that no cached entry points to a deleted file
+SPILL_MAX_AGE = 25 * 60 * 60
+
+
+class SpilledFrame(NamedTuple):
+    """A cached frame written to disk. This small handle is what the cache keeps."""
+
+    path: str
+    rows: int
+    bytes: int
+
+
+def setting(name: str, default):
+    """Get an optional setting from the secrets"""
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        return default
+
+
+def cache_dir() -> str:
+    """Get the directory of spilled frames, set with `cache_dir` in the secrets"""
+    default = os.path.join(tempfile.gettempdir(), "data_sources_app")
+    path = setting("cache_dir", default)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def remove_old_spills(directory: str):
+    """Delete the spilled files that no cached entry can still point to"""
+    now = time.time()
+    for entry in os.scandir(directory):
+        if (
+            entry.name.endswith(".arrow")
+            and now - entry.stat().st_mtime > SPILL_MAX_AGE
+        ):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # Removed by another session
+                pass
+
+
+def spill(df: pd.DataFrame, nbytes: int) -> SpilledFrame:
+    """Write a frame to an uncompressed Arrow file, which `load()` maps in memory"""
+    directory = cache_dir()
+    remove_old_spills(directory)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.arrow")
+    feather.write_feather(df, path, compression="uncompressed")
+    return SpilledFrame(path, len(df), nbytes)
+
+
+def load(result):
+    """Get the frame returned by a cached function, reading it from disk if it was
+    spilled. Other results are returned as is."""
+    if isinstance(result, SpilledFrame):
+        return feather.read_table(result.path, memory_map=True).to_pandas()
+    return result
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of the frame where repeated strings are stored as categories
+    and integers use the smallest type that fits. The values don't change."""
+    dtypes = {}
+    for column in df.select_dtypes("object"):
+        if df[column].nunique() < len(df) / 2:
+            dtypes[column] = "category"
+    for column in df.select_dtypes("integer"):
+        dtypes[column] = pd.to_numeric(df[column], downcast="integer").dtype
+    return df.astype(dtypes)
+
+
+# Share the frame sizes across all users connected to the app
+@st.experimental_singleton()
+def get_frame_sizes() -> dict:
+    """Create the registry of cached frame sizes, by source and label"""
+    return {"lock": threading.Lock(), "frames": OrderedDict()}
+
+
+def record_size(
+    source: str, label: str, raw: pd.DataFrame, cached: pd.DataFrame, spilled: bool
+):
+    """Remember how much memory a cached frame uses, before and after compaction"""
+    registry = get_frame_sizes()
+    with registry["lock"]:
+        frames = registry["frames"]
+        frames[(source, label)] = {
+            "source": source,
+            "frame": label,
+            "rows": len(cached),
+            "raw bytes": int(raw.memory_usage(deep=True).sum()),
+            "bytes": int(cached.memory_usage(deep=True).sum()),
+            "on disk": spilled,
+        }
+        frames.move_to_end((source, label))
+        while len(frames) > MAX_TRACKED_FRAMES:
+            frames.popitem(last=False)
+
+
+def to_cache(df: pd.DataFrame, source: str, label: str):
+    """Compact a frame before it is cached, and record its size.
+    Frames above `max_cached_mb` are spilled to disk: use `load()` to read them."""
+    cached = compact(df)
+    nbytes = int(cached.memory_usage(deep=True).sum())
+    if nbytes > setting("max_cached_mb", MAX_CACHED_MB) * 1024**2:
+        try:
+            result = spill(cached, nbytes)
+        except (pa.ArrowException, OSError):  # Unsupported column type, full disk...
+            logger.warning(
+                "%s: %s uses %d bytes and can't be written to disk, it is kept in memory",
+                source,
+                label,
+                nbytes,
+            )
+        else:
+            record_size(source, label, df, cached, spilled=True)
+            return result
+    record_size(source, label, df, cached, spilled=False)
+    return cached
+
+
+def frame_sizes() -> pd.DataFrame:
+    """Get the size of every recorded cached frame, largest first"""
+    registry = get_frame_sizes()
+    with registry["lock"]:
+        sizes = list(registry["frames"].values())
+    columns = ["source", "frame", "rows", "raw bytes", "bytes", "on disk"]
+    return pd.DataFrame(sizes, columns=columns).sort_values("bytes", ascending=False)
+
+
+def size_summary(source: str) -> str:
+    """Describe the memory used by the cached frames of a source"""
+    sizes = frame_sizes()
+    sizes = sizes[sizes.source == source]
+    in_memory = sizes[~sizes["on disk"].astype(bool)]
+    cached, raw = in_memory["bytes"].sum(), sizes["raw bytes"].sum()
+    return (
+        f"🗜️ {len(in_memory)} cached frame(s) use {cached / 1024 ** 2:.2f} MB, "
+        f"{(raw - sizes['bytes'].sum()) / 1024 ** 2:.2f} MB saved by compact encoding, "
+        f"{len(sizes) - len(in_memory)} spilled to disk"
+    )
+
+
+def query_registry() -> sqlite3.Connection:
+    """Open the registry of recent query IDs, kept in `cache_dir` so that it
+    survives restarts and is shared by every server process using that directory"""
+    connection = sqlite3.connect(
+        os.path.join(cache_dir(), "queries.sqlite"), timeout=10
+    )
+    connection.execute("""CREATE TABLE IF NOT EXISTS queries (
+            key TEXT PRIMARY KEY, fingerprint TEXT, query_id TEXT, ran_at REAL
+        )""")
+    return connection
+
+
+def recall_query(key: str, fingerprint: str, retention: float):
+    """Get the ID of a query that ran with this key on the same fingerprint less
+    than `retention` seconds ago, or None. Reusing a result restarts its retention
+    period, so the time at which the query ran is refreshed."""
+    now = time.time()
+    with closing(query_registry()) as connection, connection:
+        connection.execute("DELETE FROM queries WHERE ran_at <= ?", (now - retention,))
+        row = connection.execute(
+            "SELECT query_id FROM queries WHERE key = ? AND fingerprint = ?",
+            (key, fingerprint),
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE queries SET ran_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+
+def remember_query(key: str, fingerprint: str, query_id: str):
+    """Record the ID of a query, replacing the one that ran with the same key"""
+    with closing(query_registry()) as connection, connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO queries VALUES (?, ?, ?, ?)",
+            (key, fingerprint, query_id, time.time()),
+        )
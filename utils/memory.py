@@ -0,0 +1,210 @@
+import hmac
+import sys
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+from utils.caching import frame_sizes, setting
+from utils.scheduler import session_id, SESSION_ID_KEY
+
+MEMORY_IDENTIFIER = "🧮 Memory usage"
+
+# Session state keys used by this page, left out of the measurements
+HISTORY_KEY = "memory_history"
+SNAPSHOT_KEY = "memory_snapshot"
+AUTHORIZED_KEY = "memory_authorized"
+
+# Number of reruns to keep in the history
+HISTORY_LENGTH = 100
+
+# Sessions that traced allocations but haven't rerun the page for this many
+# seconds (closed tab, lost connection...) stop counting as tracing
+TRACING_LEASE = 10 * 60
+
+
+def password() -> str:
+    """Get the admin password of the page, set with `memory_page_password`"""
+    return setting("memory_page_password", "")
+
+
+def is_enabled() -> bool:
+    """The page is only listed when an admin password is set in the secrets"""
+    return bool(password())
+
+
+def is_authorized() -> bool:
+    """Ask for the admin password, once per session"""
+    if st.session_state.get(AUTHORIZED_KEY):
+        return True
+    attempt = st.text_input("Admin password", type="password")
+    if attempt:
+        if hmac.compare_digest(attempt.encode(), password().encode()):
+            st.session_state[AUTHORIZED_KEY] = True
+            return True
+        st.error("❌ Wrong password")
+    return False
+
+
+def peak_memory_mb():
+    """Get the peak memory of the server process, if the platform reports it"""
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak / 1024 / 1024
+    return peak / 1024
+
+
+# tracemalloc is process-wide: share its state across all users of the app
+@st.experimental_singleton()
+def get_tracer() -> dict:
+    """Create the shared tracing state: the sessions using it, with the last time
+    they reran the page, and a generation number bumped each time tracing starts"""
+    return {"lock": threading.Lock(), "sessions": {}, "generation": 0}
+
+
+def expire_leases(tracer: dict):
+    """Forget the sessions gone quiet, stopping tracemalloc once none is left.
+    Must be called with the tracer's lock held."""
+    now = time.time()
+    for session, last_seen in list(tracer["sessions"].items()):
+        if now - last_seen >= TRACING_LEASE:
+            del tracer["sessions"][session]
+    if not tracer["sessions"] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def start_tracing(session: str) -> int:
+    """Register this session as a user of tracemalloc, starting it if needed"""
+    tracer = get_tracer()
+    with tracer["lock"]:
+        expire_leases(tracer)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracer["generation"] += 1
+        tracer["sessions"][session] = time.time()
+        return tracer["generation"]
+
+
+def stop_tracing(session: str):
+    """Unregister this session, stopping tracemalloc once no session uses it"""
+    tracer = get_tracer()
+    with tracer["lock"]:
+        tracer["sessions"].pop(session, None)
+        expire_leases(tracer)
+
+
+def leave_page():
+    """Called on every rerun of another page: stop tracing for this session and
+    drop its snapshot, which holds every traced allocation"""
+    st.session_state.pop(SNAPSHOT_KEY, None)
+    if SESSION_ID_KEY in st.session_state:
+        stop_tracing(session_id())
+
+
+def deep_size(obj, seen=None) -> int:
+    """Estimate the memory used by an object and everything it references"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    return size
+
+
+def session_sizes() -> pd.DataFrame:
+    """Get the estimated size of each entry in this viewer's session state"""
+    sizes = [
+        (key, type(value).__name__, deep_size(value))
+        for key, value in st.session_state.items()
+        if key not in (HISTORY_KEY, SNAPSHOT_KEY, SESSION_ID_KEY, AUTHORIZED_KEY)
+    ]
+    return pd.DataFrame(sizes, columns=["key", "type", "bytes"]).sort_values(
+        "bytes", ascending=False
+    )
+
+
+def allocation_diff(session: str, limit: int = 10) -> pd.DataFrame:
+    """Compare allocations with the ones from the previous rerun"""
+    generation = start_tracing(session)
+
+    snapshot = tracemalloc.take_snapshot()
+    previous = st.session_state.get(SNAPSHOT_KEY)
+    st.session_state[SNAPSHOT_KEY] = (generation, snapshot)
+    # Snapshots taken before tracing restarted can't be compared
+    if previous is None or previous[0] != generation:
+        return pd.DataFrame()
+    previous = previous[1]
+
+    stats = snapshot.compare_to(previous, "lineno")[:limit]
+    return pd.DataFrame(
+        [(str(stat.traceback), stat.size_diff, stat.count_diff) for stat in stats],
+        columns=["location", "bytes diff", "count diff"],
+    )
+
+
+def app():
+
+    st.markdown(f"## {MEMORY_IDENTIFIER}")
+
+    if not is_authorized():
+        st.stop()
+
+    peak_memory = peak_memory_mb()
+    if peak_memory is not None:
+        st.metric("Server peak memory (MB)", f"{peak_memory:.1f}")
+
+    cached = frame_sizes()
+    in_memory = cached[~cached["on disk"].astype(bool)]
+    st.write(
+        f"🗃️ Cached frames use {in_memory.bytes.sum() / 1024 ** 2:.2f} MB in memory, "
+        f"{len(cached) - len(in_memory)} more are on disk"
+    )
+    by_source = cached.groupby("source")[["rows", "raw bytes", "bytes"]].sum()
+    st.dataframe(by_source.sort_values("bytes", ascending=False))
+    st.dataframe(cached)
+    st.caption(
+        "Sizes are recorded by this server process when a frame is cached: "
+        "entries evicted since then may still be listed."
+    )
+
+    sizes = session_sizes()
+    total = int(sizes.bytes.sum())
+
+    history = st.session_state.setdefault(HISTORY_KEY, [])
+    history.append(total)
+    del history[:-HISTORY_LENGTH]
+
+    st.write(f"👇 Your session state uses about {total / 1024:.1f} KB")
+    st.dataframe(sizes)
+
+    st.write("📈 Session state size across reruns (bytes)")
+    st.line_chart(pd.DataFrame({"bytes": history}))
+
+    if st.checkbox("Compare allocations between reruns (slows down the server)"):
+        diff = allocation_diff(session_id())
+        if diff.empty:
+            st.write("Rerun the app to see what was allocated in between!")
+        else:
+            st.write("👇 Top allocation changes since the previous rerun")
+            st.dataframe(diff)
+    else:
+        leave_page()
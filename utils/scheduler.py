@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from itertools import count
+
+import streamlit as st
+
+# Maximum number of queries running at once on each source, across all users
+MAX_CONCURRENT_QUERIES = 4
+
+# Priority classes: waiting interactive queries always run before bulk ones
+INTERACTIVE = "interactive"  # Catalog lookups, needed to draw the page
+BULK = "bulk"  # Heavy data pulls
+PRIORITIES = (INTERACTIVE, BULK)
+
+# Maximum number of seconds to wait for a query slot before giving up
+WAIT_TIMEOUT = 30
+# Number of seconds between two checks of the deadline while waiting
+POLL_INTERVAL = 0.5
+
+SESSION_ID_KEY = "session_id"
+
+
+class QueryTimeout(Exception):
+    """Raised when no query slot freed up in time"""
+
+
+def session_id() -> str:
+    """Get an identifier for this viewer's session"""
+    return st.session_state.setdefault(SESSION_ID_KEY, str(uuid.uuid4()))
+
+
+# Share one queue per source across all users connected to the app
+@st.experimental_singleton()
+def get_queue(source: str) -> dict:
+    """Create the query queue of a source: the sessions running a query and the
+    waiting tickets, as (priority, arrival number, session id) tuples"""
+    return {
+        "condition": threading.Condition(),
+        "arrivals": count(),
+        "running": set(),
+        "waiting": [],
+    }
+
+
+def can_run(queue: dict, ticket: tuple) -> bool:
+    """Whether a ticket gets one of the free slots. Tickets are served by priority,
+    then in arrival order, skipping the sessions that already run a query: each
+    session holds at most one slot, so one viewer can't starve the others."""
+    free = MAX_CONCURRENT_QUERIES - len(queue["running"])
+    ahead = set()
+    for waiting in sorted(queue["waiting"]):
+        if len(ahead) >= free:
+            return False
+        if waiting[2] in queue["running"] or waiting[2] in ahead:
+            continue
+        if waiting == ticket:
+            return True
+        ahead.add(waiting[2])
+    return False
+
+
+@contextmanager
+def query_slot(source: str, priority: str = BULK):
+    """Wait for a free query slot on a source and hold it.
+    Raise `QueryTimeout` after `WAIT_TIMEOUT` seconds of waiting."""
+    queue = get_queue(source)
+    session = session_id()
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    with queue["condition"]:
+        ticket = (PRIORITIES.index(priority), next(queue["arrivals"]), session)
+        queue["waiting"].append(ticket)
+        try:
+            while not can_run(queue, ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise QueryTimeout(
+                        f"No {source} query slot freed up in {WAIT_TIMEOUT} seconds"
+                    )
+                queue["condition"].wait(min(POLL_INTERVAL, remaining))
+            queue["running"].add(session)
+        finally:
+            queue["waiting"].remove(ticket)
+            # Another ticket may now be first in line
+            queue["condition"].notify_all()
+    try:
+        yield
+    finally:
+        with queue["condition"]:
+            queue["running"].discard(session)
+            queue["condition"].notify_all()
+
+
+def queue_summary(source: str) -> str:
+    """Describe the queries running and waiting on a source"""
+    queue = get_queue(source)
+    with queue["condition"]:
+        running = len(queue["running"])
+        waiting = [ticket[0] for ticket in queue["waiting"]]
+    by_priority = ", ".join(
+        f"{waiting.count(index)} {priority}"
+        for index, priority in enumerate(PRIORITIES)
+    )
+    return (
+        f"🚦 Queries running: {running}/{MAX_CONCURRENT_QUERIES}, "
+        f"waiting: {by_priority}"
+    )
@@ -1,3 +1,6 @@
+import functools
+import inspect
+import textwrap
 import streamlit as st
 import requests
 from PIL import Image
@@ -47,6 +50,15 @@ def load_keyboard_class():
     )
 
 
+# Cached here rather than in streamlit_app.py, which is re-executed on every rerun.
+# Edited modules are reloaded as new functions, so the cache never goes stale.
+@functools.lru_cache(maxsize=None)
+def source_code(function):
+    """Get the dedented source code of a function, without its `def` line"""
+    sourcelines, _ = inspect.getsourcelines(function)
+    return textwrap.dedent("".join(sourcelines[1:]))
+
+
 def to_button(text):
     return f'<span class="kbdx">{text}</span>'
 